@@ -1,77 +1,140 @@
 import random
-from typing import Dict, List, Set, Optional
+from array import array
+from itertools import combinations
+from typing import Dict, FrozenSet, List, Optional
+
+
+_REGION_MAP = {
+    'UAV_001': 'north',
+    'UAV_002': 'north',
+    'UAV_003': 'east',
+    'UAV_004': 'east',
+    'UAV_005': 'south',
+    'UAV_006': 'south',
+    'UAV_007': 'west',
+    'UAV_008': 'west',
+    'UAV_009': 'center',
+    'UAV_010': 'center'
+}
 
 
 class NetworkTopology:
     def __init__(self, seed=42):
         random.seed(seed)
         self.uavs = {}
+        # Edges change only through add_connection/remove_connection, which
+        # keep total_connections and the adjacency index below in sync.
         self.connections = {}
         self.regions = {}
+        self.active_count = 0
+        self.total_connections = 0
         self.initialized = False
+        self._order = []
+        self._index = {}
+        self._degrees = array('i')
+        self._adj_bits = []
+        self._adjacency_dirty = True
     
     def initialize_network(self, num_uavs=10, connection_probability=0.3):
         uav_ids = [f"UAV_{i:03d}" for i in range(1, num_uavs + 1)]
         
         for uav_id in uav_ids:
+            region = _REGION_MAP.get(uav_id, 'unknown')
             self.uavs[uav_id] = {
                 'id': uav_id,
                 'status': 'active',
-                'region': self._assign_region(uav_id),
+                'region': region,
                 'connection_strength': random.uniform(0.5, 1.0),
                 'last_seen': None
             }
             self.connections[uav_id] = set()
+            self.regions.setdefault(region, set()).add(uav_id)
         
-        for uav_id in uav_ids:
-            for other_id in uav_ids:
-                if uav_id != other_id and random.random() < connection_probability:
-                    self.connections[uav_id].add(other_id)
-                    self.connections[other_id].add(uav_id)
+        for uav_id, other_id in combinations(uav_ids, 2):
+            if random.random() < connection_probability:
+                self.connections[uav_id].add(other_id)
+                self.connections[other_id].add(uav_id)
         
+        self.active_count = sum(1 for info in self.uavs.values() if info['status'] == 'active')
+        self.total_connections = sum(len(conns) for conns in self.connections.values()) // 2
+        self._adjacency_dirty = True
         self.initialized = True
     
-    def _assign_region(self, uav_id: str) -> str:
-        region_map = {
-            'UAV_001': 'north',
-            'UAV_002': 'north',
-            'UAV_003': 'east',
-            'UAV_004': 'east',
-            'UAV_005': 'south',
-            'UAV_006': 'south',
-            'UAV_007': 'west',
-            'UAV_008': 'west',
-            'UAV_009': 'center',
-            'UAV_010': 'center'
-        }
-        return region_map.get(uav_id, 'unknown')
+    def _build_adjacency(self):
+        if not self._adjacency_dirty:
+            return
+        
+        order = list(self.connections)
+        index = {uav_id: i for i, uav_id in enumerate(order)}
+        degrees = array('i')
+        adj_bits = []
+        for uav_id in order:
+            neighbors = self.connections[uav_id]
+            degrees.append(len(neighbors))
+            row = 0
+            for neighbor in neighbors:
+                row |= 1 << index[neighbor]
+            adj_bits.append(row)
+        
+        self._order = order
+        self._index = index
+        self._degrees = degrees
+        self._adj_bits = adj_bits
+        self._adjacency_dirty = False
     
     def get_uav_info(self, uav_id: str) -> Optional[Dict]:
-        return self.uavs.get(uav_id)
+        info = self.uavs.get(uav_id)
+        return dict(info) if info is not None else None
     
     def update_uav_status(self, uav_id: str, status: str = 'active', last_seen: Optional[float] = None):
         if uav_id in self.uavs:
+            previous = self.uavs[uav_id]['status']
+            if previous != status:
+                if previous == 'active':
+                    self.active_count -= 1
+                elif status == 'active':
+                    self.active_count += 1
             self.uavs[uav_id]['status'] = status
             if last_seen:
                 self.uavs[uav_id]['last_seen'] = last_seen
     
-    def get_connected_uavs(self, uav_id: str) -> Set[str]:
-        return self.connections.get(uav_id, set())
+    def get_connected_uavs(self, uav_id: str) -> FrozenSet[str]:
+        return frozenset(self.connections.get(uav_id, ()))
+    
+    def add_connection(self, uav_id: str, other_id: str) -> bool:
+        if uav_id == other_id or uav_id not in self.connections or other_id not in self.connections:
+            return False
+        
+        neighbors = self.connections[uav_id]
+        if other_id in neighbors:
+            return False
+        neighbors.add(other_id)
+        self.connections[other_id].add(uav_id)
+        self.total_connections += 1
+        self._adjacency_dirty = True
+        return True
+    
+    def remove_connection(self, uav_id: str, other_id: str) -> bool:
+        neighbors = self.connections.get(uav_id)
+        if not neighbors or other_id not in neighbors:
+            return False
+        
+        neighbors.discard(other_id)
+        self.connections[other_id].discard(uav_id)
+        self.total_connections -= 1
+        self._adjacency_dirty = True
+        return True
     
     def is_valid_uav(self, uav_id: str) -> bool:
         return uav_id in self.uavs
     
     def get_region_uavs(self, region: str) -> List[str]:
-        return [uav_id for uav_id, info in self.uavs.items() if info['region'] == region]
+        return sorted(self.regions.get(region, ()))
     
     def get_network_statistics(self) -> Dict:
-        active_count = sum(1 for info in self.uavs.values() if info['status'] == 'active')
-        total_connections = sum(len(conns) for conns in self.connections.values()) // 2
-        
-        region_counts = {}
-        for info in self.uavs.values():
-            region = info['region']
-            region_counts[region] = region_counts.get(region, 0) + 1
+        active_count = self.active_count
+        total_connections = self.total_connections
+        region_counts = {region: len(members) for region, members in self.regions.items()}
         
         return {
             'total_uavs': len(self.uavs),
@@ -90,51 +153,75 @@ class NetworkTopology:
         if source == destination:
             return [source]
         
-        visited = set()
-        queue = [(source, [source])]
+        self._build_adjacency()
+        src = self._index.get(source)
+        dst = self._index.get(destination)
+        if src is None or dst is None:
+            return None
+        
+        # Frontier and visited sets are bitsets over UAV indices, so each BFS
+        # level expands with one OR per frontier node instead of one set
+        # operation per edge.
+        adj_bits = self._adj_bits
+        target = 1 << dst
+        parent = [-1] * len(self._order)
+        visited = frontier = 1 << src
         
-        while queue:
-            current, path = queue.pop(0)
-            if current == destination:
-                return path
-            
-            visited.add(current)
-            for neighbor in self.connections.get(current, set()):
-                if neighbor not in visited:
-                    queue.append((neighbor, path + [neighbor]))
+        while frontier:
+            next_frontier = 0
+            pending = frontier
+            while pending:
+                low = pending & -pending
+                current = low.bit_length() - 1
+                pending ^= low
+                discovered = adj_bits[current] & ~(visited | next_frontier)
+                if not discovered:
+                    continue
+                next_frontier |= discovered
+                while discovered:
+                    bit = discovered & -discovered
+                    parent[bit.bit_length() - 1] = current
+                    discovered ^= bit
+                if next_frontier & target:
+                    path = [self._order[dst]]
+                    node = dst
+                    while node != src:
+                        node = parent[node]
+                        path.append(self._order[node])
+                    path.reverse()
+                    return path
+            visited |= next_frontier
+            frontier = next_frontier
         
         return None
     
     def get_isolated_uavs(self) -> List[str]:
-        isolated = []
-        for uav_id, connections in self.connections.items():
-            if len(connections) == 0:
-                isolated.append(uav_id)
-        return isolated
+        self._build_adjacency()
+        degrees = self._degrees
+        return [uav_id for i, uav_id in enumerate(self._order) if degrees[i] == 0]
     
     def get_highly_connected_uavs(self, min_connections: int = 5) -> List[str]:
-        highly_connected = []
-        for uav_id, connections in self.connections.items():
-            if len(connections) >= min_connections:
-                highly_connected.append(uav_id)
-        return highly_connected
+        self._build_adjacency()
+        degrees = self._degrees
+        return [uav_id for i, uav_id in enumerate(self._order) if degrees[i] >= min_connections]
     
     def simulate_connection_failure(self, uav_id: str, probability: float = 0.1):
-        if uav_id not in self.connections:
+        neighbors = self.connections.get(uav_id)
+        if not neighbors:
             return
         
-        connections_to_remove = []
-        for connected_id in self.connections[uav_id]:
-            if random.random() < probability:
-                connections_to_remove.append(connected_id)
+        draw = random.random
+        connections_to_remove = [connected_id for connected_id in sorted(neighbors) if draw() < probability]
         
         for connected_id in connections_to_remove:
-            self.connections[uav_id].discard(connected_id)
-            self.connections[connected_id].discard(uav_id)
+            self.remove_connection(uav_id, connected_id)
     
     def reset_network(self):
         self.uavs.clear()
         self.connections.clear()
         self.regions.clear()
+        self.active_count = 0
+        self.total_connections = 0
         self.initialized = False
+        self._adjacency_dirty = True
 
@@ -1,17 +1,50 @@
 import base64
 import json
 import time
-from typing import Dict, Optional, Tuple
+import zlib
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+# The low 16 bits of an Adler-32 digest hold 1 + sum(data) mod 65521, so for
+# payloads whose byte sum cannot reach the modulus zlib gives us the exact sum.
+_ADLER_MOD = 65521
+_ADLER_MAX_LEN = (_ADLER_MOD - 2) // 255
+
+_REQUIRED_PACKET_FIELDS = ('packet_id', 'uav_id', 'timestamp', 'payload', 'checksum')
+_REQUIRED_PACKET_FIELD_SET = frozenset(_REQUIRED_PACKET_FIELDS)
+_REQUIRED_TELEMETRY_FIELDS = frozenset({'uav_id', 'timestamp', 'altitude', 'speed', 'heading', 'battery', 'status'})
+_NUMERIC_TELEMETRY_FIELDS = ('altitude', 'speed', 'heading', 'battery')
+_NUMERIC = (int, float)
+_MAX_VALIDATION_ERRORS = 1024
+_DEFAULT_UAV_IDS = frozenset(f"UAV_{i:03d}" for i in range(1, 11))
+# Returned by PacketValidator._decode_payload when the payload cannot be
+# decoded, so validators can tell it apart from "not decoded yet" (None).
+_DECODE_FAILED = object()
+
+
+def calculate_checksum(data: bytes) -> int:
+    if len(data) <= _ADLER_MAX_LEN:
+        return ((zlib.adler32(data) & 0xFFFF) - 1) % 10000
+    return sum(data) % 10000
+
+
+def decode_payload(payload) -> bytes:
+    # In-process packets carry raw bytes; text payloads are base64 off the wire.
+    if isinstance(payload, (bytes, bytearray)):
+        return payload
+    return base64.b64decode(payload)
 
 
 class PacketValidator:
     def __init__(self, valid_uav_ids=None):
         if valid_uav_ids is None:
-            self.valid_uav_ids = {f"UAV_{i:03d}" for i in range(1, 11)}
+            self.valid_uav_ids = set(_DEFAULT_UAV_IDS)
         else:
             self.valid_uav_ids = set(valid_uav_ids)
         
-        self.validation_errors = []
+        self.validation_errors = deque(maxlen=_MAX_VALIDATION_ERRORS)
+        self.error_count = 0
         self.validated_count = 0
         self.invalid_count = 0
     
@@ -19,17 +52,26 @@ class PacketValidator:
         if packet is None:
             return False, "packet_is_none"
         
-        required_fields = ['packet_id', 'uav_id', 'timestamp', 'payload', 'checksum']
-        for field in required_fields:
-            if field not in packet:
-                return False, f"missing_field_{field}"
+        if not _REQUIRED_PACKET_FIELD_SET <= packet.keys():
+            for field in _REQUIRED_PACKET_FIELDS:
+                if field not in packet:
+                    return False, f"missing_field_{field}"
         
         return True, "valid"
     
-    def validate_checksum(self, packet: Dict) -> Tuple[bool, int, int]:
+    def _decode_payload(self, packet: Dict):
         try:
-            payload_bytes = base64.b64decode(packet['payload'])
-            expected_checksum = sum(payload_bytes) % 10000
+            return decode_payload(packet['payload'])
+        except Exception:
+            return _DECODE_FAILED
+    
+    def validate_checksum(self, packet: Dict, payload_bytes: Optional[bytes] = None) -> Tuple[bool, int, int]:
+        if payload_bytes is _DECODE_FAILED:
+            return False, 0, packet.get('checksum', 0)
+        try:
+            if payload_bytes is None:
+                payload_bytes = decode_payload(packet['payload'])
+            expected_checksum = calculate_checksum(payload_bytes)
             actual_checksum = packet['checksum']
             return actual_checksum == expected_checksum, expected_checksum, actual_checksum
         except Exception:
@@ -39,33 +81,30 @@ class PacketValidator:
         uav_id = packet.get('uav_id', '')
         return uav_id in self.valid_uav_ids
     
-    def validate_payload_format(self, packet: Dict) -> Tuple[bool, Optional[Dict]]:
+    def validate_payload_format(self, packet: Dict, payload_bytes: Optional[bytes] = None) -> Tuple[bool, Optional[Dict]]:
+        if payload_bytes is _DECODE_FAILED:
+            return False, None
         try:
-            payload_bytes = base64.b64decode(packet['payload'])
+            if payload_bytes is None:
+                payload_bytes = decode_payload(packet['payload'])
             decoded = payload_bytes.decode('utf-8')
             telemetry = json.loads(decoded)
             
-            required_telemetry_fields = ['uav_id', 'timestamp', 'altitude', 'speed', 'heading', 'battery', 'status']
-            for field in required_telemetry_fields:
-                if field not in telemetry:
-                    return False, None
-            
-            if not isinstance(telemetry['altitude'], (int, float)):
-                return False, None
-            if not isinstance(telemetry['speed'], (int, float)):
-                return False, None
-            if not isinstance(telemetry['heading'], (int, float)):
-                return False, None
-            if not isinstance(telemetry['battery'], (int, float)):
+            if not _REQUIRED_TELEMETRY_FIELDS <= telemetry.keys():
                 return False, None
             
+            for field in _NUMERIC_TELEMETRY_FIELDS:
+                if not isinstance(telemetry[field], _NUMERIC):
+                    return False, None
+            
             return True, telemetry
         except Exception:
             return False, None
     
-    def validate_timestamp(self, packet: Dict, max_age_seconds: float = 60.0) -> bool:
+    def validate_timestamp(self, packet: Dict, max_age_seconds: float = 60.0, current_time: Optional[float] = None) -> bool:
         packet_timestamp = packet.get('timestamp', 0)
-        current_time = time.time()
+        if current_time is None:
+            current_time = time.time()
         age = current_time - packet_timestamp
         return 0 <= age <= max_age_seconds
     
@@ -84,8 +123,9 @@ class PacketValidator:
             return result
         
         self.validated_count += 1
+        payload_bytes = self._decode_payload(packet)
         
-        checksum_valid, expected, actual = self.validate_checksum(packet)
+        checksum_valid, expected, actual = self.validate_checksum(packet, payload_bytes)
         result['validation_details']['checksum'] = {
             'valid': checksum_valid,
             'expected': expected,
@@ -102,7 +142,7 @@ class PacketValidator:
         if not uav_id_valid:
             result['errors'].append('invalid_uav_id')
         
-        payload_valid, telemetry = self.validate_payload_format(packet)
+        payload_valid, telemetry = self.validate_payload_format(packet, payload_bytes)
         result['validation_details']['payload'] = {
             'valid': payload_valid,
             'telemetry_available': telemetry is not None
@@ -110,39 +150,86 @@ class PacketValidator:
         if not payload_valid:
             result['errors'].append('invalid_payload_format')
         
-        timestamp_valid = self.validate_timestamp(packet)
+        now = time.time()
+        timestamp_valid = self.validate_timestamp(packet, current_time=now)
         result['validation_details']['timestamp'] = {
             'valid': timestamp_valid,
-            'age_seconds': time.time() - packet.get('timestamp', 0)
+            'age_seconds': now - packet.get('timestamp', 0)
         }
         if not timestamp_valid:
             result['warnings'].append('timestamp_out_of_range')
         
-        if not result['errors']:
-            result['is_valid'] = True
-        
         if result['errors']:
-            self.invalid_count += 1
-            self.validation_errors.append({
-                'packet_id': packet.get('packet_id'),
-                'errors': result['errors'],
-                'timestamp': time.time()
-            })
+            self._record_failure(packet, result['errors'], now)
+        else:
+            result['is_valid'] = True
         
         return result
     
+    def full_validation_batch(self, packets: List[Optional[Dict]], max_age_seconds: float = 60.0) -> Dict:
+        now = time.time()
+        is_valid = []
+        errors = {}
+        warnings = {}
+        
+        for index, packet in enumerate(packets):
+            structure_valid, structure_error = self.validate_structure(packet)
+            if not structure_valid:
+                is_valid.append(False)
+                errors[index] = [structure_error]
+                self.invalid_count += 1
+                continue
+            
+            self.validated_count += 1
+            payload_bytes = self._decode_payload(packet)
+            packet_errors = []
+            
+            if not self.validate_checksum(packet, payload_bytes)[0]:
+                packet_errors.append('checksum_mismatch')
+            if not self.validate_uav_id(packet):
+                packet_errors.append('invalid_uav_id')
+            if not self.validate_payload_format(packet, payload_bytes)[0]:
+                packet_errors.append('invalid_payload_format')
+            
+            if not self.validate_timestamp(packet, max_age_seconds, now):
+                warnings[index] = ['timestamp_out_of_range']
+            
+            if packet_errors:
+                errors[index] = packet_errors
+                self._record_failure(packet, packet_errors, now)
+            is_valid.append(not packet_errors)
+        
+        return {
+            'is_valid': is_valid,
+            'errors': errors,
+            'warnings': warnings,
+            'valid_count': len(is_valid) - len(errors),
+            'invalid_count': len(errors)
+        }
+    
+    def _record_failure(self, packet: Dict, errors: List[str], now: float):
+        self.invalid_count += 1
+        self.error_count += 1
+        self.validation_errors.append({
+            'packet_id': packet.get('packet_id'),
+            'errors': errors,
+            'timestamp': now
+        })
+    
     def get_validation_stats(self) -> Dict:
         total = self.validated_count + self.invalid_count
+        errors = self.validation_errors
         return {
             'total_validated': self.validated_count,
             'total_invalid': self.invalid_count,
             'validation_rate': self.validated_count / total if total > 0 else 0,
-            'error_count': len(self.validation_errors),
-            'recent_errors': self.validation_errors[-10:] if self.validation_errors else []
+            'error_count': self.error_count,
+            'recent_errors': [errors[i] for i in range(-min(10, len(errors)), 0)]
         }
     
     def reset_stats(self):
         self.validation_errors.clear()
+        self.error_count = 0
         self.validated_count = 0
         self.invalid_count = 0
 
@@ -1,7 +1,24 @@
 import json
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _format_timestamp(timestamp: datetime) -> Tuple[str, str]:
+    # Aware datetimes for the same instant compare equal across timezones,
+    # so the offset is part of the cache key.
+    return _format_timestamp_cached(timestamp, timestamp.utcoffset())
+
+
+@lru_cache(maxsize=128)
+def _format_timestamp_cached(timestamp: datetime, utcoffset) -> Tuple[str, str]:
+    return timestamp.isoformat(), timestamp.strftime('%Y%m%d_%H%M%S')
 
 
 class ReportGenerator:
@@ -11,14 +28,18 @@ class ReportGenerator:
     
     def generate_json_report(self, data: Dict, filename: str) -> Path:
         filepath = self.output_dir / filename
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filepath, 'w') as f:
+                json.dump(data, f, indent=2)
         return filepath
     
     def generate_summary_report(self, summary_data: Dict, timestamp: datetime) -> Path:
+        generated_at, stamp = _format_timestamp(timestamp)
         report_data = {
             'report_metadata': {
-                'generated_at': timestamp.isoformat(),
+                'generated_at': generated_at,
                 'report_type': 'simulation_summary'
             },
             'simulation_summary': {
@@ -45,13 +66,14 @@ class ReportGenerator:
             'all_alerts': summary_data.get('all_alerts', [])
         }
         
-        filename = f'analysis_run_{timestamp.strftime("%Y%m%d")}.json'
+        filename = f'analysis_run_{stamp[:8]}.json'
         return self.generate_json_report(report_data, filename)
     
     def generate_detailed_report(self, summary_data: Dict, stats_data: Dict, validation_data: Dict, timestamp: datetime) -> Path:
+        generated_at, stamp = _format_timestamp(timestamp)
         report_data = {
             'report_metadata': {
-                'generated_at': timestamp.isoformat(),
+                'generated_at': generated_at,
                 'report_type': 'detailed_analysis'
             },
             'simulation_summary': {
@@ -80,50 +102,40 @@ class ReportGenerator:
             'all_alerts': summary_data.get('all_alerts', [])
         }
         
-        filename = f'detailed_analysis_{timestamp.strftime("%Y%m%d_%H%M%S")}.json'
+        filename = f'detailed_analysis_{stamp}.json'
         return self.generate_json_report(report_data, filename)
     
     def generate_alert_report(self, alerts: List[Dict], timestamp: datetime) -> Path:
+        generated_at, stamp = _format_timestamp(timestamp)
+        by_severity = {}
+        by_type = {}
+        for alert in alerts:
+            by_severity.setdefault(alert.get('severity', 'unknown'), []).append(alert)
+            by_type.setdefault(alert.get('type', 'unknown'), []).append(alert)
+        
         alert_report = {
             'report_metadata': {
-                'generated_at': timestamp.isoformat(),
+                'generated_at': generated_at,
                 'report_type': 'alert_analysis',
                 'total_alerts': len(alerts)
             },
-            'alerts_by_severity': self._group_alerts_by_severity(alerts),
-            'alerts_by_type': self._group_alerts_by_type(alerts),
+            'alerts_by_severity': by_severity,
+            'alerts_by_type': by_type,
             'chronological_alerts': sorted(alerts, key=lambda x: x.get('timestamp', 0)),
-            'critical_alerts': [a for a in alerts if a.get('severity') == 'critical'],
-            'high_severity_alerts': [a for a in alerts if a.get('severity') == 'high'],
-            'medium_severity_alerts': [a for a in alerts if a.get('severity') == 'medium'],
-            'low_severity_alerts': [a for a in alerts if a.get('severity') == 'low']
+            'critical_alerts': by_severity.get('critical', []),
+            'high_severity_alerts': by_severity.get('high', []),
+            'medium_severity_alerts': by_severity.get('medium', []),
+            'low_severity_alerts': by_severity.get('low', [])
         }
         
-        filename = f'alerts_{timestamp.strftime("%Y%m%d_%H%M%S")}.json'
+        filename = f'alerts_{stamp}.json'
         return self.generate_json_report(alert_report, filename)
     
-    def _group_alerts_by_severity(self, alerts: List[Dict]) -> Dict:
-        grouped = {}
-        for alert in alerts:
-            severity = alert.get('severity', 'unknown')
-            if severity not in grouped:
-                grouped[severity] = []
-            grouped[severity].append(alert)
-        return grouped
-    
-    def _group_alerts_by_type(self, alerts: List[Dict]) -> Dict:
-        grouped = {}
-        for alert in alerts:
-            alert_type = alert.get('type', 'unknown')
-            if alert_type not in grouped:
-                grouped[alert_type] = []
-            grouped[alert_type].append(alert)
-        return grouped
-    
     def generate_metrics_report(self, stats_data: Dict, timestamp: datetime) -> Path:
+        generated_at, stamp = _format_timestamp(timestamp)
         metrics_report = {
             'report_metadata': {
-                'generated_at': timestamp.isoformat(),
+                'generated_at': generated_at,
                 'report_type': 'performance_metrics'
             },
             'packet_metrics': {
@@ -143,6 +155,6 @@ class ReportGenerator:
             }
         }
         
-        filename = f'metrics_{timestamp.strftime("%Y%m%d_%H%M%S")}.json'
+        filename = f'metrics_{stamp}.json'
         return self.generate_json_report(metrics_report, filename)
 
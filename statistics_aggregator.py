@@ -1,6 +1,6 @@
 import time
-from collections import defaultdict, deque
-from typing import Dict, List
+from collections import Counter, deque
+from typing import Dict, Tuple
 
 
 class StatisticsAggregator:
@@ -9,12 +9,20 @@ class StatisticsAggregator:
         self.packet_timestamps = deque(maxlen=window_size)
         self.latency_samples = deque(maxlen=window_size)
         self.checksum_errors = deque(maxlen=window_size)
-        self.uav_packet_counts = defaultdict(int)
-        self.anomaly_counts = defaultdict(int)
-        self.alert_counts = defaultdict(int)
-        self.severity_counts = defaultdict(int)
+        self.uav_packet_counts = Counter()
+        self.anomaly_counts = Counter()
+        self.alert_counts = Counter()
+        self.severity_counts = Counter()
         self.cycle_metrics = []
         self.start_time = time.time()
+        self._latency_stats = None
+        self._lat_sum = 0.0
+        self._lat_sumsq = 0.0
+        self._checksum_err_sum = 0
+        self._time_series = None
+        self._uav_total = 0
+        self._anomaly_total = 0
+        self._alert_total = 0
     
     def record_packet(self, packet, cycle_number: int):
         current_time = time.time()
@@ -22,21 +30,35 @@ class StatisticsAggregator:
         
         if packet:
             self.uav_packet_counts[packet.get('uav_id', 'unknown')] += 1
+            self._uav_total += 1
             if packet.get('anomaly'):
                 self.anomaly_counts[packet['anomaly']] += 1
+                self._anomaly_total += 1
         
         if len(self.packet_timestamps) >= 2:
             latency = self.packet_timestamps[-1] - self.packet_timestamps[-2]
+            if len(self.latency_samples) == self.window_size:
+                evicted = self.latency_samples[0]
+                self._lat_sum -= evicted
+                self._lat_sumsq -= evicted * evicted
             self.latency_samples.append(latency)
+            self._lat_sum += latency
+            self._lat_sumsq += latency * latency
+            self._latency_stats = None
     
     def record_checksum_error(self, has_error: bool):
+        if len(self.checksum_errors) == self.window_size:
+            self._checksum_err_sum -= self.checksum_errors[0]
         self.checksum_errors.append(1 if has_error else 0)
+        if has_error:
+            self._checksum_err_sum += 1
     
     def record_alert(self, alert: Dict):
         alert_type = alert.get('type', 'unknown')
         severity = alert.get('severity', 'unknown')
         self.alert_counts[alert_type] += 1
         self.severity_counts[severity] += 1
+        self._alert_total += 1
     
     def record_cycle_metrics(self, cycle_number: int, metrics: Dict):
         self.cycle_metrics.append({
@@ -44,6 +66,7 @@ class StatisticsAggregator:
             'timestamp': time.time(),
             'metrics': metrics
         })
+        self._time_series = None
     
     def calculate_packet_rate(self) -> float:
         if len(self.packet_timestamps) < 2:
@@ -64,68 +87,63 @@ class StatisticsAggregator:
                 'variance': 0.0
             }
         
-        sorted_latencies = sorted(self.latency_samples)
-        n = len(sorted_latencies)
-        mean = sum(sorted_latencies) / n
-        
-        if n % 2 == 0:
-            median = (sorted_latencies[n//2 - 1] + sorted_latencies[n//2]) / 2
-        else:
-            median = sorted_latencies[n//2]
-        
-        variance = sum((x - mean) ** 2 for x in sorted_latencies) / n
-        std_dev = variance ** 0.5
+        if self._latency_stats is None:
+            sorted_latencies = sorted(self.latency_samples)
+            n = len(sorted_latencies)
+            mean = self._lat_sum / n
+            
+            if n % 2 == 0:
+                median = (sorted_latencies[n//2 - 1] + sorted_latencies[n//2]) / 2
+            else:
+                median = sorted_latencies[n//2]
+            
+            variance = max(self._lat_sumsq / n - mean * mean, 0.0)
+            std_dev = variance ** 0.5
+            
+            self._latency_stats = {
+                'mean': mean,
+                'median': median,
+                'min': sorted_latencies[0],
+                'max': sorted_latencies[-1],
+                'std_dev': std_dev,
+                'variance': variance
+            }
         
-        return {
-            'mean': mean,
-            'median': median,
-            'min': min(sorted_latencies),
-            'max': max(sorted_latencies),
-            'std_dev': std_dev,
-            'variance': variance
-        }
+        return dict(self._latency_stats)
     
     def calculate_checksum_error_rate(self) -> float:
         if not self.checksum_errors:
             return 0.0
-        return sum(self.checksum_errors) / len(self.checksum_errors)
+        return self._checksum_err_sum / len(self.checksum_errors)
     
-    def get_uav_distribution(self) -> Dict:
-        total = sum(self.uav_packet_counts.values())
+    def _distribution(self, counts: Counter, total: int) -> Dict:
         if total == 0:
             return {}
         
-        distribution = {}
-        for uav_id, count in self.uav_packet_counts.items():
-            distribution[uav_id] = {
-                'count': count,
-                'percentage': (count / total) * 100
-            }
-        return distribution
+        scale = 100.0 / total
+        return {
+            key: {'count': count, 'percentage': count * scale}
+            for key, count in counts.items()
+        }
+    
+    def get_uav_distribution(self) -> Dict:
+        return self._distribution(self.uav_packet_counts, self._uav_total)
     
     def get_anomaly_distribution(self) -> Dict:
-        total = sum(self.anomaly_counts.values())
-        if total == 0:
-            return {}
-        
-        distribution = {}
-        for anomaly_type, count in self.anomaly_counts.items():
-            distribution[anomaly_type] = {
-                'count': count,
-                'percentage': (count / total) * 100
-            }
-        return distribution
+        return self._distribution(self.anomaly_counts, self._anomaly_total)
     
     def get_alert_statistics(self) -> Dict:
         return {
-            'total_alerts': sum(self.alert_counts.values()),
+            'total_alerts': self._alert_total,
             'alerts_by_type': dict(self.alert_counts),
             'alerts_by_severity': dict(self.severity_counts),
             'unique_alert_types': len(self.alert_counts)
         }
     
-    def get_time_series_data(self) -> List[Dict]:
-        return list(self.cycle_metrics)
+    def get_time_series_data(self) -> Tuple[Dict, ...]:
+        if self._time_series is None:
+            self._time_series = tuple(self.cycle_metrics)
+        return self._time_series
     
     def get_comprehensive_stats(self) -> Dict:
         latency_stats = self.calculate_latency_stats()
@@ -153,4 +171,12 @@ class StatisticsAggregator:
         self.severity_counts.clear()
         self.cycle_metrics.clear()
         self.start_time = time.time()
+        self._latency_stats = None
+        self._lat_sum = 0.0
+        self._lat_sumsq = 0.0
+        self._checksum_err_sum = 0
+        self._time_series = None
+        self._uav_total = 0
+        self._anomaly_total = 0
+        self._alert_total = 0
 
@@ -1,18 +1,24 @@
 import asyncio
-import base64
 import json
 import logging
+import math
 import random
 import time
-from collections import defaultdict, deque
+from array import array
+from collections import Counter, defaultdict, deque
 from datetime import datetime
 from pathlib import Path
 
-from packet_validator import PacketValidator
+from packet_validator import PacketValidator, calculate_checksum
 from statistics_aggregator import StatisticsAggregator
 from report_generator import ReportGenerator
 from network_topology import NetworkTopology
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,11 +26,69 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Telemetry has a fixed schema, so the payload is formatted directly. Floats
+# use repr(), which is what json.dumps emits, keeping the bytes identical.
+_TELEMETRY_TEMPLATE = (
+    '{"uav_id": "%s", "timestamp": %r, "altitude": %r, "speed": %r, '
+    '"heading": %r, "battery": %r, "status": "operational"}'
+)
+_LATENCY_WINDOW = 50
+_REPEAT_ID_MIN_PACKETS = 10
+_LOG_BUFFER_SIZE = 1 << 16
+_LOG_FLUSH_INTERVAL = 1000
+_ANOMALY_LOG_LINE = "[Cycle %d] Anomaly detected: %s - UAV: %s - Packet ID: %s\n"
+_ALERT_LOG_LINE = "[Cycle %d] Alert: %s - Severity: %s - %s\n"
+
+# Alerts of a given type are always built with the same keys, so their JSON
+# for the log is formatted from a template instead of json.dumps. Numbers go
+# through %r, which is what json.dumps emits for finite ints and floats, and
+# string fields are escaped with json.dumps. An alert with a different key
+# order, severity or value type falls back to json.dumps.
+_ALERT_STRING_FIELDS = frozenset({'uav_id'})
+
+
+def _alert_template(alert_type, severity, *fields):
+    slots = ''.join(', "%s": %%%s' % (key, 's' if key in _ALERT_STRING_FIELDS else 'r') for key in fields)
+    template = '{"type": "%s"%s, "severity": "%s"}' % (alert_type, slots, severity)
+    return alert_type, (('type',) + fields + ('severity',), severity, template, fields)
+
+
+_ALERT_JSON_TEMPLATES = dict((
+    _alert_template('packet_loss', 'high', 'timestamp'),
+    _alert_template('spoofed_id', 'critical', 'timestamp', 'uav_id'),
+    _alert_template('malformed_payload', 'medium', 'timestamp', 'packet_id'),
+    _alert_template('high_latency_variance', 'medium', 'timestamp', 'variance'),
+    _alert_template('high_checksum_mismatch_rate', 'high', 'timestamp', 'rate'),
+    _alert_template('repeated_id_frequency', 'medium', 'timestamp', 'uav_id', 'frequency'),
+))
+
+
+def _alert_json(alert):
+    spec = _ALERT_JSON_TEMPLATES.get(alert.get('type'))
+    if spec is None:
+        return json.dumps(alert)
+    keys, severity, template, fields = spec
+    if tuple(alert) != keys or alert['severity'] != severity:
+        return json.dumps(alert)
+    
+    values = []
+    for key in fields:
+        value = alert[key]
+        if key in _ALERT_STRING_FIELDS:
+            if type(value) is not str:
+                return json.dumps(alert)
+            value = json.dumps(value)
+        elif (type(value) is not float and type(value) is not int) or not -math.inf < value < math.inf:
+            return json.dumps(alert)
+        values.append(value)
+    return template % tuple(values)
+
 
 class ChannelEmulator:
-    def __init__(self, seed=42, anomaly_rate=0.1, topology=None):
-        random.seed(seed)
+    def __init__(self, seed=42, anomaly_rate=0.1, topology=None, simulate_timing=True):
+        self._rng = random.Random(seed)
         self.anomaly_rate = anomaly_rate
+        self.simulate_timing = simulate_timing
         self.packet_counter = 0
         self.topology = topology
         if self.topology is None:
@@ -32,38 +96,42 @@ class ChannelEmulator:
             self.topology.initialize_network(num_uavs=10)
         self.uav_ids = list(self.topology.uavs.keys())
         self.anomaly_types = ['packet_loss', 'malformed_payload', 'spoofed_id']
+        self._fake_ids = tuple(f"UAV_{i}" for i in range(100, 1000))
         
     async def generate_packet(self):
-        await asyncio.sleep(random.uniform(0.01, 0.05))
+        # The packet is built before the simulated delay so that packets
+        # generated concurrently keep the order in which they were requested.
+        delay, packet = self._next_packet()
+        if self.simulate_timing:
+            await asyncio.sleep(delay)
+        return packet
+    
+    def generate_batch(self, n):
+        return [self._next_packet()[1] for _ in range(n)]
+    
+    def _next_packet(self):
+        # The channel delay is drawn even when it is not simulated, so a seed
+        # yields the same packet stream either way.
+        delay = self._rng.uniform(0.01, 0.05)
         self.packet_counter += 1
         
-        if random.random() < self.anomaly_rate:
-            anomaly_type = random.choice(self.anomaly_types)
-            return self._create_anomalous_packet(anomaly_type)
+        if self._rng.random() < self.anomaly_rate:
+            anomaly_type = self._rng.choice(self.anomaly_types)
+            return delay, self._create_anomalous_packet(anomaly_type)
         else:
-            return self._create_normal_packet()
+            return delay, self._create_normal_packet()
     
     def _create_normal_packet(self):
-        uav_id = random.choice(self.uav_ids)
+        uav_id = self._rng.choice(self.uav_ids)
         timestamp = time.time()
-        telemetry_data = {
-            'uav_id': uav_id,
-            'timestamp': timestamp,
-            'altitude': random.uniform(100, 5000),
-            'speed': random.uniform(10, 100),
-            'heading': random.uniform(0, 360),
-            'battery': random.uniform(20, 100),
-            'status': 'operational'
-        }
-        payload = json.dumps(telemetry_data).encode('utf-8')
-        encoded = base64.b64encode(payload).decode('utf-8')
+        payload = self._build_telemetry_payload(uav_id, timestamp)
         checksum = self._calculate_checksum(payload)
         
         return {
             'packet_id': self.packet_counter,
             'uav_id': uav_id,
             'timestamp': timestamp,
-            'payload': encoded,
+            'payload': payload,
             'checksum': checksum,
             'anomaly': None
         }
@@ -72,60 +140,53 @@ class ChannelEmulator:
         if anomaly_type == 'packet_loss':
             return None
         
-        uav_id = random.choice(self.uav_ids)
+        uav_id = self._rng.choice(self.uav_ids)
         timestamp = time.time()
         
         if anomaly_type == 'malformed_payload':
-            telemetry_data = {
-                'uav_id': uav_id,
-                'timestamp': timestamp,
-                'altitude': random.uniform(100, 5000),
-                'speed': random.uniform(10, 100),
-                'heading': random.uniform(0, 360),
-                'battery': random.uniform(20, 100),
-                'status': 'operational'
-            }
-            payload = json.dumps(telemetry_data).encode('utf-8')
-            encoded = base64.b64encode(payload).decode('utf-8')
-            checksum = random.randint(1000, 9999)
+            payload = self._build_telemetry_payload(uav_id, timestamp)
+            checksum = self._rng.randint(1000, 9999)
             
             return {
                 'packet_id': self.packet_counter,
                 'uav_id': uav_id,
                 'timestamp': timestamp,
-                'payload': encoded,
+                'payload': payload,
                 'checksum': checksum,
                 'anomaly': 'malformed_payload'
             }
         
         elif anomaly_type == 'spoofed_id':
-            fake_id = f"UAV_{random.randint(100, 999):03d}"
+            fake_id = self._rng.choice(self._fake_ids)
             if self.topology:
                 self.topology.simulate_connection_failure(fake_id, probability=0.2)
-            telemetry_data = {
-                'uav_id': fake_id,
-                'timestamp': timestamp,
-                'altitude': random.uniform(100, 5000),
-                'speed': random.uniform(10, 100),
-                'heading': random.uniform(0, 360),
-                'battery': random.uniform(20, 100),
-                'status': 'operational'
-            }
-            payload = json.dumps(telemetry_data).encode('utf-8')
-            encoded = base64.b64encode(payload).decode('utf-8')
+            payload = self._build_telemetry_payload(fake_id, timestamp)
             checksum = self._calculate_checksum(payload)
             
             return {
                 'packet_id': self.packet_counter,
                 'uav_id': fake_id,
                 'timestamp': timestamp,
-                'payload': encoded,
+                'payload': payload,
                 'checksum': checksum,
                 'anomaly': 'spoofed_id'
             }
     
+    def _build_telemetry_payload(self, uav_id, timestamp):
+        # Same arithmetic as Random.uniform(a, b), i.e. a + (b - a) * random(),
+        # without four Python-level method calls per packet.
+        draw = self._rng.random
+        return (_TELEMETRY_TEMPLATE % (
+            uav_id,
+            timestamp,
+            100 + 4900 * draw(),
+            10 + 90 * draw(),
+            360 * draw(),
+            20 + 80 * draw()
+        )).encode('utf-8')
+    
     def _calculate_checksum(self, data):
-        return sum(data) % 10000
+        return calculate_checksum(data)
 
 
 class AnomalyDetector:
@@ -134,22 +195,29 @@ class AnomalyDetector:
         self.checksum_threshold = checksum_threshold
         self.repeat_id_threshold = repeat_id_threshold
         
-        self.packet_history = deque(maxlen=100)
-        self.latencies = deque(maxlen=50)
+        self._last_arrival = None
+        self._lat_buf = array('d', [0.0]) * _LATENCY_WINDOW
+        self._lat_head = 0
+        self._lat_count = 0
+        self._lat_sum = 0.0
+        self._lat_sqsum = 0.0
         self.checksum_mismatches = 0
         self.total_packets = 0
         self.id_frequencies = defaultdict(int)
+        self._repeat_alerted = set()
         self.alerts = []
+        self._type_counts = Counter()
+        self._sev_counts = Counter()
         
-        self.validator = PacketValidator()
-        if topology:
-            self.validator.valid_uav_ids = set(topology.uavs.keys())
+        self.validator = PacketValidator(valid_uav_ids=topology.uavs.keys() if topology else None)
         
     async def analyze_packet(self, packet):
+        now = time.time()
+        
         if packet is None:
-            self.alerts.append({
+            self._add_alert({
                 'type': 'packet_loss',
-                'timestamp': time.time(),
+                'timestamp': now,
                 'severity': 'high'
             })
             return
@@ -159,58 +227,75 @@ class AnomalyDetector:
         if not validation_result['is_valid']:
             for error in validation_result['errors']:
                 if error not in ['checksum_mismatch']:
-                    self.alerts.append({
+                    self._add_alert({
                         'type': f'validation_error_{error}',
-                        'timestamp': time.time(),
+                        'timestamp': now,
                         'packet_id': packet.get('packet_id'),
                         'severity': 'high'
                     })
         
         self.total_packets += 1
-        current_time = time.time()
-        
-        if self.packet_history:
-            last_packet = self.packet_history[-1]
-            latency = current_time - last_packet['timestamp']
-            self.latencies.append(latency)
         
-        self.packet_history.append({
-            'packet_id': packet['packet_id'],
-            'uav_id': packet['uav_id'],
-            'timestamp': packet['timestamp'],
-            'checksum': packet['checksum']
-        })
+        # Latency is the gap between packet arrivals. packet['timestamp'] is
+        # set when the packet is built, before its channel delay.
+        if self._last_arrival is not None:
+            self._record_latency(now - self._last_arrival)
+        self._last_arrival = now
         
         self.id_frequencies[packet['uav_id']] += 1
         
-        checksum_valid, _, _ = self.validator.validate_checksum(packet)
-        if not checksum_valid:
+        checksum_details = validation_result['validation_details'].get('checksum', {})
+        if not checksum_details.get('valid', False):
             self.checksum_mismatches += 1
         
         if packet.get('anomaly') == 'spoofed_id':
             if not self.validator.validate_uav_id(packet):
-                self.alerts.append({
+                self._add_alert({
                     'type': 'spoofed_id',
-                    'timestamp': current_time,
+                    'timestamp': now,
                     'uav_id': packet['uav_id'],
                     'severity': 'critical'
                 })
         
         if packet.get('anomaly') == 'malformed_payload':
-            self.alerts.append({
+            self._add_alert({
                 'type': 'malformed_payload',
-                'timestamp': current_time,
+                'timestamp': now,
                 'packet_id': packet['packet_id'],
                 'severity': 'medium'
             })
         
-        self._check_statistical_thresholds(current_time)
+        self._check_statistical_thresholds(now, packet['uav_id'])
+    
+    def _add_alert(self, alert):
+        self.alerts.append(alert)
+        self._type_counts[alert['type']] += 1
+        self._sev_counts[alert['severity']] += 1
+    
+    def _record_latency(self, latency):
+        if self._lat_count == _LATENCY_WINDOW:
+            evicted = self._lat_buf[self._lat_head]
+            self._lat_sum -= evicted
+            self._lat_sqsum -= evicted * evicted
+        else:
+            self._lat_count += 1
+        self._lat_buf[self._lat_head] = latency
+        self._lat_head = (self._lat_head + 1) % _LATENCY_WINDOW
+        self._lat_sum += latency
+        self._lat_sqsum += latency * latency
+    
+    def _running_latency_variance(self):
+        n = self._lat_count
+        if n < 2:
+            return 0.0
+        mean = self._lat_sum / n
+        return max(self._lat_sqsum / n - mean * mean, 0.0)
     
-    def _check_statistical_thresholds(self, current_time):
-        if len(self.latencies) >= 10:
-            latency_variance = self._calculate_variance(list(self.latencies))
+    def _check_statistical_thresholds(self, current_time, current_uav_id):
+        if self._lat_count >= 10:
+            latency_variance = self._running_latency_variance()
             if latency_variance > self.latency_threshold:
-                self.alerts.append({
+                self._add_alert({
                     'type': 'high_latency_variance',
                     'timestamp': current_time,
                     'variance': latency_variance,
@@ -220,31 +305,42 @@ class AnomalyDetector:
         if self.total_packets > 0:
             checksum_mismatch_rate = self.checksum_mismatches / self.total_packets
             if checksum_mismatch_rate > self.checksum_threshold:
-                self.alerts.append({
+                self._add_alert({
                     'type': 'high_checksum_mismatch_rate',
                     'timestamp': current_time,
                     'rate': checksum_mismatch_rate,
                     'severity': 'high'
                 })
         
-        if self.total_packets > 0:
-            for uav_id, count in self.id_frequencies.items():
-                frequency = count / self.total_packets
-                if frequency > self.repeat_id_threshold:
-                    self.alerts.append({
-                        'type': 'repeated_id_frequency',
-                        'timestamp': current_time,
-                        'uav_id': uav_id,
-                        'frequency': frequency,
-                        'severity': 'medium'
-                    })
-    
-    def _calculate_variance(self, values):
-        if len(values) < 2:
-            return 0.0
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
-        return variance
+        if self.total_packets < _REPEAT_ID_MIN_PACKETS:
+            return
+        
+        if self.total_packets == _REPEAT_ID_MIN_PACKETS:
+            # First check after the warm-up: any UAV may already be over.
+            candidates = list(self.id_frequencies)
+        else:
+            # A UAV's share falls as the others send, so an alerted UAV re-arms
+            # once it is back under the threshold.
+            if self._repeat_alerted:
+                rearmed = [uav_id for uav_id in self._repeat_alerted
+                           if self.id_frequencies[uav_id] / self.total_packets <= self.repeat_id_threshold]
+                self._repeat_alerted.difference_update(rearmed)
+            # Only the UAV that just sent a packet can have crossed the threshold.
+            candidates = (current_uav_id,)
+        
+        for uav_id in candidates:
+            if uav_id in self._repeat_alerted:
+                continue
+            frequency = self.id_frequencies[uav_id] / self.total_packets
+            if frequency > self.repeat_id_threshold:
+                self._repeat_alerted.add(uav_id)
+                self._add_alert({
+                    'type': 'repeated_id_frequency',
+                    'timestamp': current_time,
+                    'uav_id': uav_id,
+                    'frequency': frequency,
+                    'severity': 'medium'
+                })
     
     def get_summary(self):
         validation_stats = self.validator.get_validation_stats()
@@ -252,8 +348,8 @@ class AnomalyDetector:
             'total_packets': self.total_packets,
             'checksum_mismatches': self.checksum_mismatches,
             'checksum_mismatch_rate': self.checksum_mismatches / self.total_packets if self.total_packets > 0 else 0,
-            'average_latency': sum(self.latencies) / len(self.latencies) if self.latencies else 0,
-            'latency_variance': self._calculate_variance(list(self.latencies)) if self.latencies else 0,
+            'average_latency': self._lat_sum / self._lat_count if self._lat_count else 0,
+            'latency_variance': self._running_latency_variance() if self._lat_count else 0,
             'unique_uav_ids': len(self.id_frequencies),
             'total_alerts': len(self.alerts),
             'alerts_by_type': self._count_alerts_by_type(),
@@ -262,27 +358,22 @@ class AnomalyDetector:
         }
     
     def _count_alerts_by_type(self):
-        counts = defaultdict(int)
-        for alert in self.alerts:
-            counts[alert['type']] += 1
-        return dict(counts)
+        return dict(self._type_counts)
     
     def _count_alerts_by_severity(self):
-        counts = defaultdict(int)
-        for alert in self.alerts:
-            counts[alert['severity']] += 1
-        return dict(counts)
+        return dict(self._sev_counts)
     
     def get_all_alerts(self):
         return self.alerts
 
 
 class SimulationRunner:
-    def __init__(self, cycles=100, seed=42, anomaly_rate=0.1):
+    def __init__(self, cycles=100, seed=42, anomaly_rate=0.1, simulate_timing=True, concurrency=1):
         self.cycles = cycles
+        self.concurrency = max(1, concurrency)
         self.topology = NetworkTopology(seed=seed)
         self.topology.initialize_network(num_uavs=10)
-        self.channel = ChannelEmulator(seed=seed, anomaly_rate=anomaly_rate, topology=self.topology)
+        self.channel = ChannelEmulator(seed=seed, anomaly_rate=anomaly_rate, topology=self.topology, simulate_timing=simulate_timing)
         self.detector = AnomalyDetector(topology=self.topology)
         self.statistics = StatisticsAggregator()
         self.report_generator = ReportGenerator(Path('logs'))
@@ -290,46 +381,32 @@ class SimulationRunner:
         self.log_dir.mkdir(exist_ok=True)
         self.start_time = datetime.now()
         self.log_file = None
+        self._last_alert_idx = 0
         
     async def run(self):
         timestamp_str = self.start_time.strftime('%Y%m%d_%H%M%S')
         log_filename = self.log_dir / f'anomalies_{timestamp_str}.log'
-        self.log_file = open(log_filename, 'w')
+        self.log_file = open(log_filename, 'w', buffering=_LOG_BUFFER_SIZE)
+        log_buffer = []
         
         logger.info(f"Starting simulation with {self.cycles} cycles")
         
+        # Up to `concurrency` packets are in flight at once so their channel
+        # delays overlap; they are still analyzed one at a time, in cycle order.
+        pending = deque()
+        next_cycle = 1
         for cycle in range(1, self.cycles + 1):
-            packet = await self.channel.generate_packet()
+            while next_cycle <= self.cycles and len(pending) < self.concurrency:
+                pending.append(asyncio.create_task(self.channel.generate_packet()))
+                next_cycle += 1
+            packet = await pending.popleft()
+            await self._process_cycle(cycle, packet, log_buffer)
             
-            self.statistics.record_packet(packet, cycle)
-            
-            if packet:
-                checksum_valid, _, _ = self.detector.validator.validate_checksum(packet)
-                self.statistics.record_checksum_error(not checksum_valid)
-                if packet.get('uav_id'):
-                    self.topology.update_uav_status(packet['uav_id'], 'active', time.time())
-            
-            await self.detector.analyze_packet(packet)
-            
-            if packet and packet.get('anomaly'):
-                log_entry = f"[Cycle {cycle}] Anomaly detected: {packet['anomaly']} - UAV: {packet['uav_id']} - Packet ID: {packet['packet_id']}\n"
-                self.log_file.write(log_entry)
-                logger.warning(f"Cycle {cycle}: Anomaly - {packet['anomaly']}")
-            
-            alerts = self.detector.get_all_alerts()
-            new_alerts = [a for a in alerts if a['timestamp'] >= (time.time() - 0.1)]
-            for alert in new_alerts:
-                self.statistics.record_alert(alert)
-                alert_entry = f"[Cycle {cycle}] Alert: {alert['type']} - Severity: {alert['severity']} - {json.dumps(alert)}\n"
-                self.log_file.write(alert_entry)
-            
-            cycle_metrics = {
-                'packets_processed': self.detector.total_packets,
-                'alerts_count': len(self.detector.alerts),
-                'checksum_errors': self.detector.checksum_mismatches
-            }
-            self.statistics.record_cycle_metrics(cycle, cycle_metrics)
+            if cycle % _LOG_FLUSH_INTERVAL == 0:
+                self.log_file.writelines(log_buffer)
+                log_buffer.clear()
         
+        self.log_file.writelines(log_buffer)
         self.log_file.close()
         
         summary = self.detector.get_summary()
@@ -359,6 +436,37 @@ class SimulationRunner:
         logger.info(f"Total packets: {summary['total_packets']}, Total alerts: {summary['total_alerts']}")
         
         return summary
+    
+    async def _process_cycle(self, cycle, packet, log_buffer):
+        now = time.time()
+        
+        self.statistics.record_packet(packet, cycle)
+        
+        if packet:
+            checksum_valid, _, _ = self.detector.validator.validate_checksum(packet)
+            self.statistics.record_checksum_error(not checksum_valid)
+            if packet.get('uav_id'):
+                self.topology.update_uav_status(packet['uav_id'], 'active', now)
+        
+        await self.detector.analyze_packet(packet)
+        
+        if packet and packet.get('anomaly'):
+            log_buffer.append(_ANOMALY_LOG_LINE % (cycle, packet['anomaly'], packet['uav_id'], packet['packet_id']))
+            logger.warning("Cycle %d: Anomaly - %s", cycle, packet['anomaly'])
+        
+        alerts = self.detector.get_all_alerts()
+        new_alerts = alerts[self._last_alert_idx:]
+        self._last_alert_idx = len(alerts)
+        for alert in new_alerts:
+            self.statistics.record_alert(alert)
+            log_buffer.append(_ALERT_LOG_LINE % (cycle, alert['type'], alert['severity'], _alert_json(alert)))
+        
+        cycle_metrics = {
+            'packets_processed': self.detector.total_packets,
+            'alerts_count': len(self.detector.alerts),
+            'checksum_errors': self.detector.checksum_mismatches
+        }
+        self.statistics.record_cycle_metrics(cycle, cycle_metrics)
 
 
 async def main():
@@ -367,5 +475,7 @@ async def main():
 
 
 if __name__ == '__main__':
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
 